@@ -1,6 +1,9 @@
 import os
+import re
+import subprocess
+
+import numpy as np
 import torch
-import soundfile as sf
 from qwen_tts import Qwen3TTSModel
 from ShortGen.audio.voice_module import VoiceModule
 
@@ -12,13 +15,17 @@ _DEFAULT_REF_AUDIO = os.path.normpath(
     os.path.join(_THIS_DIR, "..", "..", "base_voice.mp3")
 )
 
+_PIPE_BUFSIZE = 1 << 20
+
 
 class Qwen3VoiceModule(VoiceModule):
-    def __init__(self, model_id=None, language="English", ref_audio=None):
+    def __init__(self, model_id=None, language="English", ref_audio=None, load_encoder=False):
         super().__init__()
         self.language = language
+        self.load_encoder = load_encoder
         self.model_id = model_id if model_id is not None else _LOCAL_MODEL_PATH
         self.ref_audio = ref_audio if ref_audio is not None else _DEFAULT_REF_AUDIO
+        self.sample_rate = 24000
 
         if not os.path.exists(self.ref_audio):
             raise FileNotFoundError(
@@ -28,6 +35,7 @@ class Qwen3VoiceModule(VoiceModule):
 
         device = "cuda:0" if torch.cuda.is_available() else "cpu"
         dtype = torch.bfloat16 if torch.cuda.is_available() else torch.float32
+        self._use_autocast = dtype == torch.bfloat16
 
         print(f"Loading Qwen3-TTS model from {self.model_id} on {device}...")
         self.model = Qwen3TTSModel.from_pretrained(
@@ -36,19 +44,32 @@ class Qwen3VoiceModule(VoiceModule):
             dtype=dtype,
         )
         print("Model loaded successfully.")
+        if not self.load_encoder:
+            self._release_speech_tokenizer_encoder()
         print(f"Pre-computing speaker embedding from: {self.ref_audio}")
-        # Pre-compute the voice clone prompt once so it's fast per-generation
+        # Pre-compute the voice clone prompt once so it's fast per-generation.
+        # This runs outside autocast so the speaker embedding stays deterministic.
         self._voice_prompt = self.model.create_voice_clone_prompt(
             ref_audio=self.ref_audio,
             x_vector_only_mode=True,  # No reference transcript needed
         )
         print("Speaker embedding ready.")
 
-    def generate_voice(self, text, outputfile):
-        print(f"Generating audio with Qwen3-TTS for text ({len(text)} chars)...")
-        import re
-        import numpy as np
+    def _release_speech_tokenizer_encoder(self):
+        # The speech tokenizer encoder only turns reference audio into codes for ICL
+        # cloning; x-vector-only prompts never call it, so drop it to free its VRAM.
+        tts_model = getattr(self.model, "model", self.model)
+        speech_tokenizer = getattr(tts_model, "speech_tokenizer", None)
+        tokenizer_model = getattr(speech_tokenizer, "model", speech_tokenizer)
+        if getattr(tokenizer_model, "encoder", None) is None:
+            return
+        tokenizer_model.encoder = None
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        print("Speech tokenizer encoder released (voice cloning uses x-vector only).")
 
+    @staticmethod
+    def _split_text(text):
         # Split text into chunks (by sentences) to avoid massive single generations
         sentences = re.split(r"(?<=[.!?\n]) +", text.strip())
         chunks = []
@@ -61,9 +82,12 @@ class Qwen3VoiceModule(VoiceModule):
                 current_chunk += (" " if current_chunk else "") + s
         if current_chunk:
             chunks.append(current_chunk)
+        return chunks
 
-        all_wavs = []
-        out_sr = 24000
+    def synthesize(self, text):
+        """Yield one mono int16 PCM array at ``self.sample_rate`` per text chunk."""
+        print(f"Generating audio with Qwen3-TTS for text ({len(text)} chars)...")
+        chunks = self._split_text(text)
 
         for i, chunk in enumerate(chunks):
             chunk = chunk.strip()
@@ -72,18 +96,61 @@ class Qwen3VoiceModule(VoiceModule):
             print(
                 f"  -> Processing chunk {i + 1}/{len(chunks)} ({len(chunk)} chars): {chunk[:60].replace(chr(10), ' ')}..."
             )
-            wavs, sr = self.model.generate_voice_clone(
-                text=chunk,
-                language=self.language,
-                voice_clone_prompt=self._voice_prompt,
-            )
-            all_wavs.append(wavs[0])
-            out_sr = sr
+            with torch.inference_mode(), torch.autocast(
+                "cuda", dtype=torch.bfloat16, enabled=self._use_autocast
+            ):
+                wavs, sr = self.model.generate_voice_clone(
+                    text=chunk,
+                    language=self.language,
+                    voice_clone_prompt=self._voice_prompt,
+                )
+            self.sample_rate = sr
+            yield (np.clip(wavs[0], -1.0, 1.0) * 32767).astype(np.int16)
 
-        if not all_wavs:
+    def generate_voice(self, text, outputfile):
+        pcm_chunks = self.synthesize(text)
+        # The sample rate is only known once the first chunk has been generated
+        first_chunk = next(pcm_chunks, None)
+        if first_chunk is None:
             raise ValueError("TTS did not generate any audio.")
 
-        final_wav = np.concatenate(all_wavs)
-        sf.write(outputfile, final_wav, out_sr)
+        process = subprocess.Popen(
+            [
+                "ffmpeg",
+                "-y",
+                "-loglevel",
+                "error",
+                "-f",
+                "s16le",
+                "-ar",
+                str(self.sample_rate),
+                "-ac",
+                "1",
+                "-i",
+                "pipe:0",
+                outputfile,
+            ],
+            stdin=subprocess.PIPE,
+            bufsize=_PIPE_BUFSIZE,
+        )
+
+        # ffmpeg encodes in its own process while the next chunk is generated here
+        try:
+            process.stdin.write(first_chunk.tobytes())
+            for chunk in pcm_chunks:
+                process.stdin.write(chunk.tobytes())
+        except BrokenPipeError:
+            # ffmpeg exited early; its exit code is reported below
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            returncode = process.wait()
+
+        if returncode != 0:
+            raise RuntimeError(
+                f"ffmpeg failed to encode TTS audio (exit code {returncode})")
         print(f"Audio saved to {outputfile}")
         return outputfile
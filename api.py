@@ -77,7 +77,7 @@ def generate_video_sync(job: GenerateRequest) -> str:
     Synchronous function that runs the generation pipeline.
     Returns the path to the completed video, or raises an Exception.
     """
-    logger.info(f"Starting generation for short_id: {job.short_id}")
+    logger.info("Starting generation for short_id: %s", job.short_id)
 
     # Check assets
     video_folder = os.path.abspath(os.path.join("assets", "videos"))
@@ -110,7 +110,7 @@ def generate_video_sync(job: GenerateRequest) -> str:
 
     # Run the generation process
     for step_num, step_info in engine.makeContent():
-        logger.info(f"[{job.short_id}] Step {step_num}: {step_info}")
+        logger.info("[%s] Step %s: %s", job.short_id, step_num, step_info)
 
     # Move result to output
     if hasattr(engine, "_db_video_path") and os.path.exists(engine._db_video_path):
@@ -126,9 +126,9 @@ def generate_video_sync(job: GenerateRequest) -> str:
                 shutil.rmtree(engine.dynamicAssetDir)
             except Exception as e:
                 logger.warning(
-                    f"Could not clean dynamic directory {engine.dynamicAssetDir}: {e}")
+                    "Could not clean dynamic directory %s: %s", engine.dynamicAssetDir, e)
 
-        logger.info(f"[{job.short_id}] Video saved to {final_video_path}")
+        logger.info("[%s] Video saved to %s", job.short_id, final_video_path)
         return final_video_path
     else:
         raise FileNotFoundError(
@@ -141,9 +141,9 @@ async def send_webhook(url: str, payload: dict):
         async with httpx.AsyncClient() as client:
             response = await client.post(url, json=payload, timeout=60.0)
             response.raise_for_status()
-            logger.info(f"Webhook sent successfully to {url}")
+            logger.info("Webhook sent successfully to %s", url)
     except Exception as e:
-        logger.error(f"Failed to send webhook to {url}: {e}")
+        logger.error("Failed to send webhook to %s: %s", url, e)
 
 
 async def process_queue():
@@ -152,7 +152,7 @@ async def process_queue():
     while True:
         job: GenerateRequest = await job_queue.get()
         try:
-            logger.info(f"Processing job {job.short_id} from queue...")
+            logger.info("Processing job %s from queue...", job.short_id)
 
             # Run the heavy synchronous workload in a separate thread
             # so it doesn't block the FastAPI event loop
@@ -166,7 +166,7 @@ async def process_queue():
             })
 
         except Exception as e:
-            logger.error(f"Job {job.short_id} failed: {e}")
+            logger.error("Job %s failed: %s", job.short_id, e)
             import traceback
             traceback.print_exc()
             try:
@@ -184,7 +184,7 @@ async def process_queue():
         finally:
             job_queue.task_done()
             logger.info(
-                f"Finished processing job {job.short_id}. Waiting for next...")
+                "Finished processing job %s. Waiting for next...", job.short_id)
 
 
 @asynccontextmanager
@@ -220,7 +220,7 @@ async def generate_video(request: GenerateRequest):
     """
     await job_queue.put(request)
     logger.info(
-        f"Job {request.short_id} added to the queue. Current queue size: {job_queue.qsize()}")
+        "Job %s added to the queue. Current queue size: %s", request.short_id, job_queue.qsize())
     return {
         "status": "accepted",
         "short_id": request.short_id,
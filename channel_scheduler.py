@@ -13,6 +13,11 @@ from typing import Any, Dict, List, Optional
 
 from dotenv import load_dotenv
 
+try:
+    import uvloop
+except ImportError:  # uvloop does not support Windows
+    uvloop = None
+
 from scrapper import (
     fetch_and_process_posts,
     get_last_fetch_time,
@@ -765,8 +770,8 @@ def run_fetch_job(force: bool = False, fetch_interval_hours: int = 24) -> bool:
 
 
 def start_scheduler(config: Dict[str, Any]):
-    BlockingScheduler = importlib.import_module(
-        "apscheduler.schedulers.blocking").BlockingScheduler
+    AsyncIOScheduler = importlib.import_module(
+        "apscheduler.schedulers.asyncio").AsyncIOScheduler
     CronTrigger = importlib.import_module(
         "apscheduler.triggers.cron").CronTrigger
 
@@ -785,14 +790,24 @@ def start_scheduler(config: Dict[str, Any]):
 
     fetch_hour, fetch_minute = parse_hhmm(fetch_time)
 
-    scheduler = BlockingScheduler(timezone=timezone)
+    event_loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+    asyncio.set_event_loop(event_loop)
+    scheduler = AsyncIOScheduler(event_loop=event_loop, timezone=timezone)
     now_utc = dt.datetime.now(dt.timezone.utc)
 
     fetch_trigger = CronTrigger(
         hour=fetch_hour, minute=fetch_minute, timezone=timezone)
+    # Jobs run the blocking fetch/render work in a worker thread so the event loop
+    # keeps servicing timers.
+    async def fetch_job():
+        await asyncio.to_thread(
+            run_fetch_job, force=False, fetch_interval_hours=fetch_interval_hours)
+
+    async def pipeline_job():
+        await asyncio.to_thread(run_pipeline_once, config)
+
     scheduler.add_job(
-        lambda: run_fetch_job(
-            force=False, fetch_interval_hours=fetch_interval_hours),
+        fetch_job,
         trigger=fetch_trigger,
         id="daily_fetch_posts",
         replace_existing=True,
@@ -806,7 +821,7 @@ def start_scheduler(config: Dict[str, Any]):
         publish_trigger = CronTrigger(
             hour=publish_hour, minute=publish_minute, timezone=timezone)
         scheduler.add_job(
-            lambda: run_pipeline_once(config),
+            pipeline_job,
             trigger=publish_trigger,
             id=f"daily_generate_and_upload_{index + 1}",
             replace_existing=True,
@@ -831,6 +846,16 @@ def start_scheduler(config: Dict[str, Any]):
         ),
     )
     scheduler.start()
+    try:
+        event_loop.run_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        # AsyncIOScheduler.shutdown only queues itself on the loop via
+        # call_soon_threadsafe, so give the loop one more turn to run it
+        scheduler.shutdown(wait=False)
+        event_loop.run_until_complete(asyncio.sleep(0))
+        event_loop.close()
 
 
 def main():
@@ -1,8 +1,12 @@
 import os
 import argparse
+import functools
+import hashlib
+import inspect
+import json
 import random
 import shutil
-from typing import List, Dict
+from typing import List, Dict, Set
 
 # --- MOVIEPY WINERROR 6 FIX FOR PYTHON 3.13 ---
 import subprocess
@@ -36,6 +40,88 @@ logger = configure_logging("LocalGen")
 
 QWEN_TTS = "Qwen3-TTS (Local Model High Quality)"
 
+GENERATED_HASHES_FILE = ".generated_hashes"
+
+NVENC_PARAMS = ["-tune", "ll", "-rc", "vbr", "-cq", "23", "-b:v", "6M", "-pix_fmt", "yuv420p"]
+
+
+@functools.lru_cache(maxsize=None)
+def has_ffmpeg_encoder(encoder: str) -> bool:
+    """
+    Check that `encoder` actually works on this machine with a one-frame trial
+    encode. Builds list hardware encoders such as h264_nvenc whether or not the
+    matching GPU is present, so `ffmpeg -encoders` is not enough.
+    """
+    try:
+        result = subprocess.run(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error",
+                "-f", "lavfi", "-i", "color=s=256x256",
+                "-frames:v", "1", "-c:v", encoder, "-f", "null", "-",
+            ],
+            capture_output=True,
+            check=False,
+            timeout=30,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return result.returncode == 0
+
+
+def configure_video_encoder() -> str:
+    """
+    Force MoviePy's ffmpeg writer onto NVENC when available, otherwise onto a
+    faster libx264 preset. Returns the codec that will be used.
+    """
+    from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+
+    if has_ffmpeg_encoder("h264_nvenc"):
+        codec, preset, extra_params = "h264_nvenc", "p1", NVENC_PARAMS
+    else:
+        codec, preset, extra_params = "libx264", "veryfast", []
+
+    original_init = FFMPEG_VideoWriter.__init__
+    signature = inspect.signature(original_init)
+
+    def encoder_init(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.arguments["codec"] = codec
+        bound.arguments["preset"] = preset
+        if extra_params:
+            # Rate control comes from NVENC_PARAMS; drop MoviePy's "-b" bitrate
+            bound.arguments["bitrate"] = None
+            bound.arguments["ffmpeg_params"] = (
+                list(bound.arguments.get("ffmpeg_params") or []) + extra_params
+            )
+        original_init(*bound.args, **bound.kwargs)
+
+    FFMPEG_VideoWriter.__init__ = encoder_init
+    return codec
+
+
+def story_hash(title: str, content: str) -> str:
+    return hashlib.blake2b(
+        f"{title}\0{content}".encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+
+def load_generated_hashes(output_folder: str) -> Set[str]:
+    hashes_path = os.path.join(output_folder, GENERATED_HASHES_FILE)
+    if not os.path.exists(hashes_path):
+        return set()
+    try:
+        with open(hashes_path, "r", encoding="utf-8") as f:
+            return set(json.load(f))
+    except (OSError, ValueError) as e:
+        logger.warning("Could not read %s: %s", hashes_path, e)
+        return set()
+
+
+def save_generated_hashes(output_folder: str, hashes: Set[str]) -> None:
+    hashes_path = os.path.join(output_folder, GENERATED_HASHES_FILE)
+    with open(hashes_path, "w", encoding="utf-8") as f:
+        json.dump(sorted(hashes), f)
+
 
 def load_stories(file_path: str) -> List[Dict[str, str]]:
     """
@@ -46,8 +132,9 @@ def load_stories(file_path: str) -> List[Dict[str, str]]:
     ---
     """
     stories = []
+    seen_hashes = set()
     if not os.path.exists(file_path):
-        logger.error(f"Stories file not found: {file_path}")
+        logger.error("Stories file not found: %s", file_path)
         return stories
 
     with open(file_path, "r", encoding="utf-8") as f:
@@ -78,6 +165,11 @@ def load_stories(file_path: str) -> List[Dict[str, str]]:
                 script += "\n" + line
 
         if title and script:
+            digest = story_hash(title, script)
+            if digest in seen_hashes:
+                logger.warning("Skipping duplicate story: %s", title)
+                continue
+            seen_hashes.add(digest)
             stories.append({"title": title, "content": script})
 
     return stories
@@ -86,11 +178,20 @@ def load_stories(file_path: str) -> List[Dict[str, str]]:
 def get_files_from_folder(folder_path: str, extensions: tuple) -> List[str]:
     if not os.path.exists(folder_path):
         return []
-    return [
-        os.path.join(folder_path, f)
-        for f in os.listdir(folder_path)
-        if f.lower().endswith(extensions)
-    ]
+    with os.scandir(folder_path) as entries:
+        return [
+            entry.path
+            for entry in entries
+            if entry.name.lower().endswith(extensions)
+        ]
+
+
+def move_file(src: str, dst: str) -> None:
+    # A rename is free on the same filesystem; only fall back to copy+unlink across mounts
+    try:
+        os.replace(src, dst)
+    except OSError:
+        shutil.move(src, dst)
 
 
 def main():
@@ -130,8 +231,7 @@ def main():
     args = parser.parse_args()
 
     # Setup output folder
-    if not os.path.exists(args.output_folder):
-        os.makedirs(args.output_folder)
+    os.makedirs(args.output_folder, exist_ok=True)
 
     # Load stories
     stories = load_stories(args.stories_file)
@@ -139,6 +239,25 @@ def main():
         logger.error("No stories found in the provided file.")
         return
 
+    # Skip stories already rendered by a previous run
+    generated_hashes = load_generated_hashes(args.output_folder)
+    stories = [
+        story for story in stories
+        if story_hash(story["title"], story["content"]) not in generated_hashes
+    ]
+    if not stories:
+        logger.info("All stories in the provided file were already generated.")
+        return
+
+    if args.N > len(stories):
+        logger.warning(
+            "Requested %s videos but only %s new stories are available; generating %s.",
+            args.N,
+            len(stories),
+            len(stories),
+        )
+        args.N = len(stories)
+
     # Check assets
     video_files = get_files_from_folder(
         args.video_folder, (".mp4", ".mov", ".avi", ".mkv")
@@ -146,10 +265,10 @@ def main():
     audio_files = get_files_from_folder(args.audio_folder, (".mp3", ".wav"))
 
     if not video_files:
-        logger.error(f"No videos found in {args.video_folder}")
+        logger.error("No videos found in %s", args.video_folder)
         return
     if not audio_files:
-        logger.error(f"No audio files found in {args.audio_folder}")
+        logger.error("No audio files found in %s", args.audio_folder)
         return
 
     # Initialize TTS
@@ -162,16 +281,23 @@ def main():
 
         voice_module = Qwen3VoiceModule()
 
+    logger.info("Using video encoder: %s", configure_video_encoder())
+
+    # Pick all background assets up front; sorting groups repeated picks of the
+    # same file together so ffmpeg reads them while still in the OS page cache.
+    asset_picks = sorted(
+        (random.choice(video_files), random.choice(audio_files))
+        for _ in range(args.N)
+    )
+
     # Generate videos
     for i in range(args.N):
-        logger.info(f"=== Generating Video {i + 1}/{args.N} ===")
+        logger.info("=== Generating Video %s/%s ===", i + 1, args.N)
 
-        # Select story (cycle if needed)
-        story = stories[i % len(stories)]
+        story = stories[i]
 
         # Select random assets
-        video_path = random.choice(video_files)
-        audio_path = random.choice(audio_files)
+        video_path, audio_path = asset_picks[i]
 
         # We need to pass just the filename/relative path if the engine expects it,
         # or absolute path. The engine seems to prepend "assets/audios/" in some places.
@@ -209,24 +335,26 @@ def main():
 
         try:
             for step_num, step_info in engine.makeContent():
-                logger.info(f"Step {step_num}: {step_info}")
+                logger.info("Step %s: %s", step_num, step_info)
 
             # Move result to output
             if os.path.exists(engine._db_video_path):
                 target_dir = os.path.join(args.output_folder, short_id)
-                if not os.path.exists(target_dir):
-                    os.makedirs(target_dir)
-                shutil.move(
+                os.makedirs(target_dir, exist_ok=True)
+                move_file(
                     engine._db_video_path, os.path.join(
                         target_dir, "video.mp4")
                 )
                 logger.info(
-                    f"Video saved to {os.path.join(target_dir, 'video.mp4')}")
+                    "Video saved to %s", os.path.join(target_dir, "video.mp4"))
+                generated_hashes.add(
+                    story_hash(story["title"], story["content"]))
+                save_generated_hashes(args.output_folder, generated_hashes)
             else:
                 logger.error("Video generation failed, output not found.")
 
         except Exception as e:
-            logger.error(f"Error generating video {i + 1}: {e}")
+            logger.error("Error generating video %s: %s", i + 1, e)
             import traceback
 
             traceback.print_exc()
@@ -1,8 +1,14 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import sys
 import traceback
 
+LOG_MAX_BYTES = 50 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
 
 def log_error(e):
     with open("error.log", "a", encoding="utf-8") as f:
@@ -11,6 +17,12 @@ def log_error(e):
 
 
 def configure_logging(logger_name: str, log_file: str = "logs/redditstoriesgen.log") -> logging.Logger:
+    # Root handlers are installed once per process; later calls only hand out named loggers.
+    # Handlers stay on the root so plain logging.getLogger() users (e.g. notification_utils)
+    # keep writing to the same sinks.
+    if getattr(configure_logging, "_done", False):
+        return logging.getLogger(logger_name)
+
     log_dir = os.path.dirname(log_file)
     if log_dir:
         os.makedirs(log_dir, exist_ok=True)
@@ -19,12 +31,30 @@ def configure_logging(logger_name: str, log_file: str = "logs/redditstoriesgen.l
     stream_handler = logging.StreamHandler(sys.stdout)
     stream_handler.setFormatter(formatter)
 
-    file_handler = logging.FileHandler(log_file, mode="a", encoding="utf-8")
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file,
+        mode="a",
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding="utf-8",
+    )
     file_handler.setFormatter(formatter)
 
+    # Callers only enqueue records; the listener thread does the console/file I/O.
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(
+        queue_handler.queue, stream_handler, file_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+
     logging.basicConfig(
         level=logging.INFO,
-        handlers=[stream_handler, file_handler],
+        handlers=[queue_handler],
         force=True,
     )
+    configure_logging._handlers = (stream_handler, file_handler)
+    configure_logging._listener = listener
+    configure_logging._done = True
     return logging.getLogger(logger_name)
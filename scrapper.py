@@ -3,7 +3,15 @@ import json
 import sqlite3
 import datetime
 import re
+import asyncio
+import functools
+import importlib.util
+import httpx
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from dotenv import load_dotenv
 
@@ -35,6 +43,34 @@ FALLBACK_SCORE_NO_XAI = int(
 FALLBACK_SCORE_ON_ERROR = int(
     os.getenv("FALLBACK_SCORE_ON_ERROR", str(QUEUE_SCORE_THRESHOLD))
 )
+XAI_MAX_CONCURRENCY = int(os.getenv("XAI_MAX_CONCURRENCY", "8"))
+XAI_CHAT_URL = "https://api.x.ai/v1/chat/completions"
+BATCH_SIZE = 5
+REDDIT_SEARCH_URL = "https://arctic-shift.photon-reddit.com/api/posts/search"
+
+# Keep-alive pools so repeated calls reuse one TCP+TLS connection per host
+# Transient failures (rate limits, 5xx) are retried with exponential backoff, honouring Retry-After
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 5
+RETRY_BACKOFF_FACTOR = 1
+RETRY_MAX_DELAY = 60
+
+_REDDIT_SESSION = requests.Session()
+_REDDIT_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=MAX_RETRIES,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=["GET", "POST"],
+        respect_retry_after_header=True,
+    ),
+))
+XAI_CONNECTION_LIMITS = httpx.Limits(
+    max_connections=16, max_keepalive_connections=16)
+# HTTP/2 multiplexes concurrent xAI requests over one connection; needs the h2 extra (httpx[http2])
+XAI_HTTP2 = importlib.util.find_spec("h2") is not None
 
 SYSTEM_PROMPT = """You are an expert social media content strategist specializing in YouTube Shorts and TikTok trends. Your task is to evaluate a batch of Reddit stories for viral potential.
 
@@ -48,11 +84,16 @@ Rules:
 - You must evaluate each post and output valid JSON.
 - Provide a single integer score between 1 and 10 for each post.
 - Treat Reddit/internet abbreviations as their full meaning during evaluation (example: AITA = Am I The Asshole, TIFU = Today I Fucked Up).
+- For each post also write platform-ready metadata as a viral short-form copywriter:
+  - youtube_title: at most 90 characters.
+  - youtube_description and tiktok_description: concise and engagement-focused.
+  - hashtags: an array of strings, each starting with # and no spaces.
+  - Expand abbreviations to full words in the metadata when natural for readability.
 - You must respond ONLY with a valid JSON object formatted exactly like this:
 {
   "results": [
-    {"index": 0, "score": 8},
-    {"index": 1, "score": 4}
+    {"index": 0, "score": 8, "youtube_title": "...", "youtube_description": "...", "tiktok_description": "...", "hashtags": ["#reddit", "#storytime"]},
+    {"index": 1, "score": 4, "youtube_title": "...", "youtube_description": "...", "tiktok_description": "...", "hashtags": ["#reddit", "#storytime"]}
   ]
 }"""
 
@@ -70,7 +111,7 @@ Rules:
 
 POLICY_SAFETY_PROMPT = """You are a content safety classifier for short-form social media narration.
 
-Given a Reddit title and story content, decide if the story is safe for general audience short-form posting.
+Given a batch of Reddit posts (title and story content), decide for each one if the story is safe for general audience short-form posting.
 
 Mark unsafe if it includes severe policy risk such as:
 - sexual content involving minors
@@ -80,14 +121,40 @@ Mark unsafe if it includes severe policy risk such as:
 - doxxing/private personal information exposure
 - Interpret abbreviations as their full meaning when classifying safety.
 
-Respond ONLY as valid JSON in this exact format:
+Respond ONLY as valid JSON in this exact format, with one entry per post index:
 {
-  "safe": true,
-  "reason": "short reason"
+  "results": [
+    {"index": 0, "safe": true, "reason": "short reason"},
+    {"index": 1, "safe": false, "reason": "short reason"}
+  ]
 }
 """
 
 
+# System messages are JSON-encoded once; request bodies are assembled around them as bytes
+XAI_MODEL = "grok-4-1-fast-non-reasoning"
+_XAI_MODEL_JSON = orjson.dumps(XAI_MODEL)
+_SCORE_SYSTEM_MSG_JSON = orjson.dumps(
+    {"role": "system", "content": SYSTEM_PROMPT})
+_METADATA_SYSTEM_MSG_JSON = orjson.dumps(
+    {"role": "system", "content": METADATA_SYSTEM_PROMPT})
+_POLICY_SYSTEM_MSG_JSON = orjson.dumps(
+    {"role": "system", "content": POLICY_SAFETY_PROMPT})
+
+_SQL_INSERT_QUEUED = (
+    "INSERT OR IGNORE INTO QueuedPosts (title, content, subreddit, score, metadata_json, usedYet, createdAt) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_SQL_INSERT_BAD = (
+    "INSERT OR IGNORE INTO BadPosts (title, content, subreddit, score, metadata_json, createdAt) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+POLICY_SKIPPED_NO_XAI_KEY = "policy_check_skipped_no_xai_key"
+POLICY_RESULT_MISSING = "policy_result_missing_fallback_allow"
+POLICY_CHECK_FAILED = "policy_check_failed_fallback_allow"
+
+
 def _load_abbreviations() -> dict[str, str]:
     if not os.path.exists(ABBREVIATIONS_PATH):
         return {}
@@ -104,8 +171,15 @@ def _load_abbreviations() -> dict[str, str]:
 ABBREVIATIONS_MAP = _load_abbreviations()
 ABBREVIATION_KEYS_SORTED = sorted(
     ABBREVIATIONS_MAP.keys(), key=len, reverse=True)
+# One alternation (longest keys first) so text is scanned in a single pass
+_ABBR_RE = re.compile(
+    r"(?<!\w)(" + "|".join(re.escape(k) for k in ABBREVIATION_KEYS_SORTED) + r")(?!\w)",
+    flags=re.IGNORECASE,
+) if ABBREVIATION_KEYS_SORTED else None
+_ABBR_LOOKUP = {k.lower(): v for k, v in ABBREVIATIONS_MAP.items()}
 
 
+@functools.lru_cache(maxsize=4)
 def get_abbreviation_reference_text(max_items: int = 40) -> str:
     if not ABBREVIATIONS_MAP:
         return "No abbreviation map provided."
@@ -121,11 +195,32 @@ def _ensure_column_exists(cursor: sqlite3.Cursor, table_name: str, column_name:
         cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {ddl}")
 
 
+def _ensure_title_index(cursor: sqlite3.Cursor, table_name: str, index_name: str):
+    try:
+        cursor.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON {table_name}(title)")
+    except sqlite3.IntegrityError:
+        # Older databases may already hold duplicate titles; keep them and index without the constraint
+        print(
+            f"WARNING: duplicate titles in {table_name}; creating non-unique index {index_name}.")
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name}(title)")
+
+
 def setup_database():
     """Initializes the SQLite database and creates tables if they don't exist."""
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
 
+    # WAL lets the scheduler read while the scraper writes; it creates posts.db-wal/-shm beside the DB
+    cursor.executescript(
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA temp_store=MEMORY;"
+        "PRAGMA cache_size=-65536;"
+        "PRAGMA mmap_size=268435456;"
+    )
+
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS QueuedPosts (
             title TEXT,
@@ -161,6 +256,16 @@ def setup_database():
     _ensure_column_exists(cursor, "BadPosts",
                           "metadata_json", "metadata_json TEXT")
 
+    _ensure_title_index(cursor, "QueuedPosts", "ix_queued_title")
+    _ensure_title_index(cursor, "BadPosts", "ix_bad_title")
+
+    # Older rows may have NULL usedYet; normalize so the queue query is a plain index range scan
+    cursor.execute("UPDATE QueuedPosts SET usedYet = 0 WHERE usedYet IS NULL")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_queued_unused_score "
+        "ON QueuedPosts(usedYet, score DESC, createdAt ASC)"
+    )
+
     conn.commit()
     return conn
 
@@ -217,72 +322,139 @@ def is_removed_or_whitespace(text: str) -> bool:
 def expand_abbreviations(text: str) -> str:
     if not text:
         return text
-    if not ABBREVIATION_KEYS_SORTED:
+    if _ABBR_RE is None:
         return text
 
-    expanded_text = text
-    for key in ABBREVIATION_KEYS_SORTED:
-        value = ABBREVIATIONS_MAP[key]
-        pattern = re.compile(
-            rf"(?<!\\w){re.escape(key)}(?!\\w)", flags=re.IGNORECASE)
-        expanded_text = pattern.sub(value, expanded_text)
-    return expanded_text
+    return _ABBR_RE.sub(lambda m: _ABBR_LOOKUP[m.group(1).lower()], text)
 
 
-def is_post_policy_safe(title: str, content: str) -> tuple[bool, str]:
-    if not XAI_API_KEY:
-        return True, "policy_check_skipped_no_xai_key"
+def _retry_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), RETRY_MAX_DELAY)
+    return min(RETRY_BACKOFF_FACTOR * (2 ** attempt), RETRY_MAX_DELAY)
 
-    url = "https://api.x.ai/v1/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {XAI_API_KEY}",
-    }
-    user_prompt = (
-        f"Title: {title}\n"
-        f"Content: {content}\n\n"
-        f"{get_abbreviation_reference_text()}\n\n"
-        "Classify this content for policy safety."
+
+async def _xai_post(
+    client: httpx.AsyncClient, sem: asyncio.Semaphore, body: bytes, timeout: float
+) -> httpx.Response:
+    """POSTs a JSON-encoded chat completion body to xAI, retrying transport errors and RETRY_STATUS_CODES responses."""
+    for attempt in range(MAX_RETRIES + 1):
+        response = None
+        try:
+            async with sem:
+                response = await client.post(XAI_CHAT_URL, content=body, timeout=timeout)
+        except httpx.TransportError:
+            if attempt == MAX_RETRIES:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt == MAX_RETRIES:
+                return response
+        # Sleep outside the semaphore so other requests can use the slot meanwhile
+        await asyncio.sleep(_retry_delay(attempt, response))
+
+
+async def _xai_chat_json(
+    client: httpx.AsyncClient,
+    sem: asyncio.Semaphore,
+    system_message_json: bytes,
+    user_prompt: str,
+    temperature: float,
+    timeout: float,
+) -> dict:
+    """Runs one JSON-mode chat completion and returns the parsed JSON object from the reply."""
+    user_message_json = orjson.dumps(
+        {"role": "user", "content": user_prompt})
+    body = (
+        b'{"model":' + _XAI_MODEL_JSON
+        + b',"messages":[' + system_message_json + b"," + user_message_json
+        + b'],"response_format":{"type":"json_object"},"temperature":'
+        + orjson.dumps(temperature) + b"}"
     )
-    payload = {
-        "model": "grok-4-1-fast-non-reasoning",
-        "messages": [
-            {"role": "system", "content": POLICY_SAFETY_PROMPT},
-            {"role": "user", "content": user_prompt},
-        ],
-        "response_format": {"type": "json_object"},
-        "temperature": 0,
-    }
+    response = await _xai_post(client, sem, body, timeout=timeout)
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+    content_str = data["choices"][0]["message"]["content"]
+    return orjson.loads(content_str)
+
+
+def _build_batch_prompt(header: str, posts_batch: list[dict]) -> str:
+    combined_prompt = header + "\n\n"
+    combined_prompt += get_abbreviation_reference_text() + "\n\n"
+    for idx, post in enumerate(posts_batch):
+        combined_prompt += f"--- POST INDEX: {idx} ---\nTitle: {post['title']}\nContent: {post['content']}\n\n"
+
+    combined_prompt += "Respond ONLY with the exact JSON structure specified in the instructions."
+    return combined_prompt
+
+
+async def get_policy_safety(
+    client: httpx.AsyncClient, sem: asyncio.Semaphore, posts_batch: list[dict]
+) -> dict[int, tuple[bool, str]]:
+    """Classifies a batch of posts for policy safety in one xAI call. Returns a mapping of index to (safe, reason)."""
+    if not posts_batch:
+        return {}
+
+    if not XAI_API_KEY:
+        return {
+            i: (True, POLICY_SKIPPED_NO_XAI_KEY)
+            for i in range(len(posts_batch))
+        }
+
+    combined_prompt = _build_batch_prompt(
+        "Classify the following batch of Reddit stories for policy safety:", posts_batch)
 
     try:
-        response = requests.post(url, headers=headers,
-                                 json=payload, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        content_str = data["choices"][0]["message"]["content"]
-        parsed = json.loads(content_str)
-        safe = bool(parsed.get("safe", False))
-        reason = str(parsed.get("reason", ""))[:300]
-        return safe, reason or "no_reason"
+        parsed = await _xai_chat_json(
+            client, sem, _POLICY_SYSTEM_MSG_JSON, combined_prompt, temperature=0, timeout=30)
+
+        safety_map = {}
+        for item in parsed.get("results", []):
+            idx = item.get("index")
+            if idx is None or not 0 <= idx < len(posts_batch):
+                continue
+            safe = bool(item.get("safe", False))
+            reason = str(item.get("reason", ""))[:300]
+            safety_map[idx] = (safe, reason or "no_reason")
+
+        missing = [i for i in range(len(posts_batch)) if i not in safety_map]
+        if missing:
+            print(
+                f"Policy response missing {len(missing)}/{len(posts_batch)} posts; allowing them by fallback.")
+        for i in missing:
+            safety_map[i] = (True, POLICY_RESULT_MISSING)
+
+        return safety_map
     except Exception as e:
         print(
-            f"Policy safety check failed; allowing post by fallback. Error: {e}")
-        return True, "policy_check_failed_fallback_allow"
+            f"Policy safety check failed for batch of size {len(posts_batch)}; allowing posts by fallback. Error: {e}")
+        return {
+            i: (True, POLICY_CHECK_FAILED)
+            for i in range(len(posts_batch))
+        }
 
 
-def post_exists(cursor, title: str) -> bool:
-    """Checks if a post with the given title already exists in either table."""
-    cursor.execute("SELECT 1 FROM QueuedPosts WHERE title = ?", (title,))
-    if cursor.fetchone():
-        return True
-    cursor.execute("SELECT 1 FROM BadPosts WHERE title = ?", (title,))
-    if cursor.fetchone():
-        return True
-    return False
+def _normalize_metadata(parsed: dict, title: str) -> dict:
+    hashtags = parsed.get("hashtags", [])
+    if not isinstance(hashtags, list):
+        hashtags = []
+    hashtags = [tag for tag in hashtags if isinstance(
+        tag, str) and tag.startswith("#")]
 
+    return {
+        "youtube_title": str(parsed.get("youtube_title", title))[:90],
+        "youtube_description": str(parsed.get("youtube_description", title)),
+        "tiktok_description": str(parsed.get("tiktok_description", title)),
+        "hashtags": hashtags or ["#reddit", "#storytime", "#shorts"],
+    }
 
-def get_post_scores(posts_batch: list[dict]) -> dict[int, int]:
-    """Calls the xAI API to score a batch of posts based on viral potential. Returns a mapping of index to score."""
+
+async def get_post_scores(
+    client: httpx.AsyncClient, sem: asyncio.Semaphore, posts_batch: list[dict]
+) -> dict[int, dict]:
+    """Calls the xAI API to score a batch of posts based on viral potential and write their metadata.
+    Returns a mapping of index to {"score": int, "metadata": dict or None}; metadata is None when the model omitted it."""
     if not posts_batch:
         return {}
 
@@ -291,69 +463,62 @@ def get_post_scores(posts_batch: list[dict]) -> dict[int, int]:
             "WARNING: XAI_API_KEY is not set. Using fallback score "
             f"{FALLBACK_SCORE_NO_XAI} for all posts."
         )
-        return {i: FALLBACK_SCORE_NO_XAI for i in range(len(posts_batch))}
-
-    url = "https://api.x.ai/v1/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {XAI_API_KEY}"
-    }
-
-    combined_prompt = "Analyze the following batch of Reddit stories:\n\n"
-    combined_prompt += get_abbreviation_reference_text() + "\n\n"
-    for idx, post in enumerate(posts_batch):
-        combined_prompt += f"--- POST INDEX: {idx} ---\nTitle: {post['title']}\nContent: {post['content']}\n\n"
-
-    combined_prompt += "Respond ONLY with the exact JSON structure specified in the instructions."
+        return {
+            i: {"score": FALLBACK_SCORE_NO_XAI, "metadata": None}
+            for i in range(len(posts_batch))
+        }
 
-    payload = {
-        "model": "grok-4-1-fast-non-reasoning",
-        "messages": [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": combined_prompt}
-        ],
-        "response_format": {"type": "json_object"},
-        "temperature": 0.5
-    }
+    combined_prompt = _build_batch_prompt(
+        "Analyze the following batch of Reddit stories:", posts_batch)
 
-    response = None
     try:
-        response = requests.post(url, headers=headers,
-                                 json=payload, timeout=60)
-        response.raise_for_status()
-        data = response.json()
-
-        content_str = data["choices"][0]["message"]["content"]
-        result = json.loads(content_str)
+        result = await _xai_chat_json(
+            client, sem, _SCORE_SYSTEM_MSG_JSON, combined_prompt, temperature=0.5, timeout=60)
 
         scores_map = {}
         for item in result.get("results", []):
             idx = item.get("index")
             score = item.get("score", 0)
-            if idx is not None:
-                scores_map[idx] = int(score)
+            if idx is None or not 0 <= idx < len(posts_batch):
+                continue
+            metadata = None
+            if item.get("youtube_title"):
+                metadata = _normalize_metadata(
+                    item, posts_batch[idx]["title"])
+            scores_map[idx] = {"score": int(score), "metadata": metadata}
 
         for i in range(len(posts_batch)):
             if i not in scores_map:
-                scores_map[i] = 0
+                scores_map[i] = {"score": 0, "metadata": None}
 
         return scores_map
     except Exception as e:
         print(
             f"Error calling xAI API for batch of size {len(posts_batch)}: {e}")
-        try:
-            if response is not None:
-                print(f"Response details: {response.text}")
-        except Exception:
-            pass
+        if isinstance(e, httpx.HTTPStatusError):
+            print(f"Response details: {e.response.text}")
         print(
             "Falling back to score "
             f"{FALLBACK_SCORE_ON_ERROR} for this batch due to scoring API failure."
         )
-        return {i: FALLBACK_SCORE_ON_ERROR for i in range(len(posts_batch))}
+        return {
+            i: {"score": FALLBACK_SCORE_ON_ERROR, "metadata": None}
+            for i in range(len(posts_batch))
+        }
+
+
+def _fallback_metadata(title: str) -> dict:
+    return {
+        "youtube_title": title[:90],
+        "youtube_description": title,
+        "tiktok_description": title,
+        "hashtags": ["#reddit", "#storytime", "#shorts"],
+    }
 
 
-def generate_post_metadata(title: str, content: str) -> dict:
+async def generate_post_metadata(
+    client: httpx.AsyncClient, sem: asyncio.Semaphore, title: str, content: str
+) -> dict:
     if not XAI_API_KEY:
         fallback = {
             "youtube_title": title[:90],
@@ -363,63 +528,29 @@ def generate_post_metadata(title: str, content: str) -> dict:
         }
         return fallback
 
-    url = "https://api.x.ai/v1/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {XAI_API_KEY}"
-    }
     user_prompt = (
         f"Title: {title}\n"
         f"Story: {content}\n\n"
         f"{get_abbreviation_reference_text()}\n\n"
         "Return ONLY the requested JSON object."
     )
-    payload = {
-        "model": "grok-4-1-fast-non-reasoning",
-        "messages": [
-            {"role": "system", "content": METADATA_SYSTEM_PROMPT},
-            {"role": "user", "content": user_prompt}
-        ],
-        "response_format": {"type": "json_object"},
-        "temperature": 0.6
-    }
     try:
-        response = requests.post(url, headers=headers,
-                                 json=payload, timeout=45)
-        response.raise_for_status()
-        data = response.json()
-        content_str = data["choices"][0]["message"]["content"]
-        parsed = json.loads(content_str)
-
-        hashtags = parsed.get("hashtags", [])
-        if not isinstance(hashtags, list):
-            hashtags = []
-        hashtags = [tag for tag in hashtags if isinstance(
-            tag, str) and tag.startswith("#")]
-
-        return {
-            "youtube_title": str(parsed.get("youtube_title", title))[:90],
-            "youtube_description": str(parsed.get("youtube_description", title)),
-            "tiktok_description": str(parsed.get("tiktok_description", title)),
-            "hashtags": hashtags or ["#reddit", "#storytime", "#shorts"],
-        }
+        parsed = await _xai_chat_json(
+            client, sem, _METADATA_SYSTEM_MSG_JSON, user_prompt, temperature=0.6, timeout=45)
+        return _normalize_metadata(parsed, title)
     except Exception as e:
         print(f"Error generating metadata: {e}")
-        return {
-            "youtube_title": title[:90],
-            "youtube_description": title,
-            "tiktok_description": title,
-            "hashtags": ["#reddit", "#storytime", "#shorts"],
-        }
+        return _fallback_metadata(title)
 
 
-def get_next_queued_post(conn: sqlite3.Connection) -> Optional[dict]:
+def get_next_queued_post(conn: sqlite3.Connection, decode_metadata: bool = True) -> Optional[dict]:
+    """Returns the best unused queued post. With decode_metadata=False the metadata JSON is not parsed and "metadata" is None."""
     cursor = conn.cursor()
     cursor.execute(
         """
         SELECT rowid, title, content, subreddit, score, metadata_json, createdAt
         FROM QueuedPosts
-        WHERE usedYet = 0 OR usedYet IS NULL
+        WHERE usedYet = 0
         ORDER BY score DESC, createdAt ASC
         LIMIT 1
         """
@@ -428,11 +559,13 @@ def get_next_queued_post(conn: sqlite3.Connection) -> Optional[dict]:
     if not row:
         return None
 
-    metadata_json = row[5] if row[5] else "{}"
-    try:
-        metadata = json.loads(metadata_json)
-    except Exception:
-        metadata = {}
+    metadata = None
+    if decode_metadata:
+        metadata_json = row[5] if row[5] else "{}"
+        try:
+            metadata = orjson.loads(metadata_json)
+        except Exception:
+            metadata = {}
 
     return {
         "rowid": row[0],
@@ -452,124 +585,217 @@ def mark_post_as_used(conn: sqlite3.Connection, rowid: int):
     conn.commit()
 
 
+async def _classify_posts(client: httpx.AsyncClient, sem: asyncio.Semaphore, posts: list[dict]) -> list[tuple[bool, str]]:
+    batches = [posts[i:i+BATCH_SIZE] for i in range(0, len(posts), BATCH_SIZE)]
+    batch_safety = await asyncio.gather(*[
+        get_policy_safety(client, sem, batch) for batch in batches
+    ])
+    return [
+        safety_map[idx]
+        for batch, safety_map in zip(batches, batch_safety)
+        for idx in range(len(batch))
+    ]
+
+
+async def _score_posts(client: httpx.AsyncClient, sem: asyncio.Semaphore, posts: list[dict]) -> list[dict]:
+    batches = [posts[i:i+BATCH_SIZE] for i in range(0, len(posts), BATCH_SIZE)]
+    print(f"Scoring {len(posts)} posts in {len(batches)} batch(es)...")
+    batch_scores = await asyncio.gather(*[
+        get_post_scores(client, sem, batch) for batch in batches
+    ])
+    return [
+        scores_map[idx]
+        for batch, scores_map in zip(batches, batch_scores)
+        for idx in range(len(batch))
+    ]
+
+
+def _fetch_subreddit(subreddit: str) -> tuple[str, list[dict]]:
+    params = {
+        "subreddit": subreddit,
+        "sort": "desc",
+        "limit": 20
+    }
+    response = _REDDIT_SESSION.get(
+        REDDIT_SEARCH_URL, params=params, timeout=15)
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+    return subreddit, data.get("data", [])
+
+
 def fetch_and_process_posts(conn):
     """Fetches posts from reddit API, filters them, scores them via LLM, and stores them in DB."""
-    cursor = conn.cursor()
-    base_url = "https://arctic-shift.photon-reddit.com/api/posts/search"
-
-    for subreddit in SUBREDDITS:
-        print(f"\nFetching posts from r/{subreddit}...")
-        params = {
-            "subreddit": subreddit,
-            "sort": "desc",
-            "limit": 20
-        }
+    asyncio.run(fetch_and_process_posts_async(conn))
 
-        try:
-            response = requests.get(base_url, params=params, timeout=15)
-            response.raise_for_status()
-            data = response.json()
-            posts = data.get("data", [])
-
-            valid_posts = []
-            for post in posts:
-                raw_title = post.get("title", "")
-                raw_content = post.get("selftext", "")
-                title = expand_abbreviations(raw_title)
-                content = expand_abbreviations(raw_content)
-                post_subreddit = post.get("subreddit", subreddit)
-
-                # Check for clean text
-                is_clean = not is_removed_or_whitespace(
-                    title) and not is_removed_or_whitespace(content)
-
-                # Check content length
-                is_right_length = MIN_LENGTH <= len(content) <= MAX_LENGTH
-
-                if not (is_clean and is_right_length):
-                    continue
-
-                # Check if it already exists in the database
-                if post_exists(cursor, title):
-                    print(f"Post already exists in DB: '{title[:50]}...'")
-                    continue
-
-                policy_safe, policy_reason = is_post_policy_safe(
-                    title=title,
-                    content=content,
-                )
-                if not policy_safe:
-                    created_at = datetime.datetime.now(
-                        datetime.timezone.utc).isoformat()
-                    policy_meta = {
-                        "policy_safe": False,
-                        "policy_reason": policy_reason,
-                    }
-                    cursor.execute(
-                        "INSERT INTO BadPosts (title, content, subreddit, score, metadata_json, createdAt) VALUES (?, ?, ?, ?, ?, ?)",
-                        (
-                            title,
-                            content,
-                            post_subreddit,
-                            -1,
-                            json.dumps(policy_meta, ensure_ascii=False),
-                            created_at,
-                        ),
-                    )
-                    conn.commit()
-                    print(
-                        f"--> Rejected by policy safety check: '{title[:30]}...' ({policy_reason})"
-                    )
-                    continue
 
-                valid_posts.append({
-                    "title": title,
-                    "content": content,
-                    "subreddit": post_subreddit
-                })
+async def fetch_and_process_posts_async(conn):
+    """Async pipeline behind fetch_and_process_posts; xAI calls run concurrently, bounded by XAI_MAX_CONCURRENCY."""
+    cursor = conn.cursor()
+    sem = asyncio.Semaphore(XAI_MAX_CONCURRENCY)
+    # Local aliases keep global lookups out of the per-post filter loop
+    local_expand = expand_abbreviations
+    local_removed = is_removed_or_whitespace
+    local_min, local_max = MIN_LENGTH, MAX_LENGTH
+    xai_headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {XAI_API_KEY}",
+    }
 
-            # Process valid posts in batches
-            BATCH_SIZE = 5
-            for i in range(0, len(valid_posts), BATCH_SIZE):
-                batch = valid_posts[i:i+BATCH_SIZE]
-                print(f"Scoring batch of {len(batch)} posts...")
+    # Titles already stored in either table, loaded once for O(1) dedup checks
+    existing = {
+        row[0] for row in cursor.execute(
+            "SELECT title FROM QueuedPosts UNION ALL SELECT title FROM BadPosts")
+    }
 
-                scores_map = get_post_scores(batch)
+    async with httpx.AsyncClient(
+        headers=xai_headers,
+        timeout=60,
+        limits=XAI_CONNECTION_LIMITS,
+        http2=XAI_HTTP2,
+    ) as client:
+        # Fetch every subreddit concurrently, then process the results one by one against the DB
+        print(f"\nFetching posts from {len(SUBREDDITS)} subreddits...")
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=len(SUBREDDITS)) as executor:
+            fetch_results = await asyncio.gather(
+                *[
+                    loop.run_in_executor(executor, _fetch_subreddit, subreddit)
+                    for subreddit in SUBREDDITS
+                ],
+                return_exceptions=True,
+            )
+
+        for subreddit, fetch_result in zip(SUBREDDITS, fetch_results):
+            if isinstance(fetch_result, Exception):
+                print(f"Error processing subreddit {subreddit}: {fetch_result}")
+                continue
+            _, posts = fetch_result
+            print(f"\nProcessing {len(posts)} posts from r/{subreddit}...")
+
+            try:
+                candidates = []
+                for post in posts:
+                    raw_title, raw_content, post_subreddit = (
+                        post.get("title", ""),
+                        post.get("selftext", ""),
+                        post.get("subreddit", subreddit),
+                    )
 
-                created_at = datetime.datetime.now(
-                    datetime.timezone.utc).isoformat()
+                    # Cheap checks on the raw text first. Expansion only grows text,
+                    # so anything already over MAX_LENGTH can be dropped before it.
+                    if local_removed(raw_title) or local_removed(raw_content):
+                        continue
+                    if len(raw_content) > local_max:
+                        continue
+
+                    # Stored titles are expanded, so dedup needs the expanded title
+                    title = local_expand(raw_title)
+                    if title in existing:
+                        print(f"Post already exists in DB: '{title[:50]}...'")
+                        continue
+
+                    content = local_expand(raw_content)
+
+                    # Check content length
+                    if not local_min <= len(content) <= local_max:
+                        continue
+                    existing.add(title)
+
+                    candidates.append({
+                        "title": title,
+                        "content": content,
+                        "subreddit": post_subreddit
+                    })
+
+                policy_results = await _classify_posts(client, sem, candidates)
+
+                # Rows are collected here and written in a single transaction per subreddit
+                queued_rows = []
+                bad_rows = []
+
+                valid_posts = []
+                for post, (policy_safe, policy_reason) in zip(candidates, policy_results):
+                    if not policy_safe:
+                        created_at = datetime.datetime.now(
+                            datetime.timezone.utc).isoformat()
+                        policy_meta = {
+                            "policy_safe": False,
+                            "policy_reason": policy_reason,
+                        }
+                        bad_rows.append((
+                            post["title"],
+                            post["content"],
+                            post["subreddit"],
+                            -1,
+                            orjson.dumps(policy_meta).decode("utf-8"),
+                            created_at,
+                        ))
+                        print(
+                            f"--> Rejected by policy safety check: '{post['title'][:30]}...' ({policy_reason})"
+                        )
+                        continue
+
+                    valid_posts.append(post)
+
+                score_results = await _score_posts(client, sem, valid_posts)
+
+                # Metadata comes back with the scores; only posts headed for the queue
+                # that the model left without it get a separate call
+                missing_metadata = [
+                    (result, post)
+                    for post, result in zip(valid_posts, score_results)
+                    if result["metadata"] is None
+                    and result["score"] >= QUEUE_SCORE_THRESHOLD
+                ]
+                fallback_metadata = await asyncio.gather(*[
+                    generate_post_metadata(
+                        client, sem, title=post["title"], content=post["content"])
+                    for _, post in missing_metadata
+                ])
+                for (result, _), metadata in zip(missing_metadata, fallback_metadata):
+                    result["metadata"] = metadata
 
                 # Store results
-                for idx, post in enumerate(batch):
+                created_at = datetime.datetime.now(
+                    datetime.timezone.utc).isoformat()
+                for post, result in zip(valid_posts, score_results):
                     title = post["title"]
                     content = post["content"]
                     post_subreddit = post["subreddit"]
-                    score = scores_map.get(idx, 0)
-                    metadata = generate_post_metadata(
-                        title=title, content=content)
-                    metadata_json = json.dumps(metadata, ensure_ascii=False)
+                    score = result["score"]
+                    metadata = result["metadata"]
+                    metadata_json = orjson.dumps(
+                        metadata).decode("utf-8") if metadata is not None else None
 
                     if score >= QUEUE_SCORE_THRESHOLD:
-                        cursor.execute(
-                            "INSERT INTO QueuedPosts (title, content, subreddit, score, metadata_json, usedYet, createdAt) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                            (title, content, post_subreddit, score,
-                             metadata_json, False, created_at)
-                        )
+                        queued_rows.append((title, content, post_subreddit, score,
+                                            metadata_json, False, created_at))
                         print(
                             f"--> Added '{title[:30]}...' to QueuedPosts with score {score}")
                     else:
-                        cursor.execute(
-                            "INSERT INTO BadPosts (title, content, subreddit, score, metadata_json, createdAt) VALUES (?, ?, ?, ?, ?, ?)",
-                            (title, content, post_subreddit,
-                             score, metadata_json, created_at)
-                        )
+                        bad_rows.append((title, content, post_subreddit,
+                                         score, metadata_json, created_at))
                         print(
                             f"--> Added '{title[:30]}...' to BadPosts with score {score}")
 
-                conn.commit()
+                # OR IGNORE lets the unique title index drop rows another scraper inserted meanwhile
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    cursor.executemany(_SQL_INSERT_QUEUED, queued_rows)
+                    inserted = max(cursor.rowcount, 0)
+                    cursor.executemany(_SQL_INSERT_BAD, bad_rows)
+                    inserted += max(cursor.rowcount, 0)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+
+                skipped = len(queued_rows) + len(bad_rows) - inserted
+                if skipped > 0:
+                    print(f"Skipped {skipped} post(s) already stored by another run.")
 
-        except Exception as e:
-            print(f"Error processing subreddit {subreddit}: {e}")
+            except Exception as e:
+                print(f"Error processing subreddit {subreddit}: {e}")
 
 
 if __name__ == "__main__":
@@ -1,122 +1,294 @@
-import json
 import os
-import random
 import datetime
-import os
-import json
-import datetime
-import random
+import sqlite3
+import functools
+import mmap
+import orjson
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Dict, List, Tuple, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+LEGACY_DATE_FORMAT = "%Y-%m-%d"
+_VIDEO_EXTS = frozenset({".mp4", ".mov", ".avi", ".mkv"})
+# Legacy JSON files larger than this are memory-mapped instead of read into memory
+MMAP_THRESHOLD = 64 * 1024
+
+# Usage data lives in SQLite so a selection only touches the selected row.
+# Rows from the old JSON database are imported once on first start.
+ASSETS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    asset_type TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    path TEXT NOT NULL,
+    last_used TEXT,
+    PRIMARY KEY (asset_type, filename)
+);
+CREATE INDEX IF NOT EXISTS idx_last_used ON assets(asset_type, last_used);
+CREATE TABLE IF NOT EXISTS reddit_links (
+    url TEXT PRIMARY KEY,
+    last_used TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_links_last_used ON reddit_links(last_used);
+"""
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_ts(value: str) -> datetime.datetime:
+    """Parse a stored last_used timestamp, accepting the legacy date-only format"""
+    for fmt in (TIMESTAMP_FORMAT, LEGACY_DATE_FORMAT):
+        try:
+            return datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return datetime.datetime.min
+
+
+def _now_str() -> str:
+    """Current local time in TIMESTAMP_FORMAT, without strftime's format parsing"""
+    return datetime.datetime.now().isoformat(sep=" ", timespec="seconds")
+
+
+def _normalize_ts(value: Optional[str]) -> Optional[str]:
+    """
+    Rewrite a last_used value into the full TIMESTAMP_FORMAT so plain string
+    comparison orders it correctly. Unparseable values become "" (oldest).
+    """
+    if not value or len(value) == 19:
+        return value
+    parsed = _parse_ts(value)
+    if parsed == datetime.datetime.min:
+        return ""
+    return parsed.strftime(TIMESTAMP_FORMAT)
+
+
+def _normalize_url(url: str) -> str:
+    """
+    Dedupe key for a link: lowercased scheme and host, no trailing slash,
+    no fragment and no utm_* tracking parameters
+    """
+    parts = urlsplit(url.strip())
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                       if not k.lower().startswith("utm_")])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(),
+                       parts.path.rstrip("/"), query, ""))
 
 
 class SelectorEngine:
-    def __init__(self, database_path="databse.json", links_path="links.txt"):
+    def __init__(self, database_path="assets.db", links_path="links.txt",
+                 legacy_database_path="databse.json"):
         self.database_path = database_path
         self.links_path = links_path
-        self.database = self._load_database()
-
-    def _load_database(self) -> Dict:
-        """Load the database from the JSON file or create it if it doesn't exist"""
-        if os.path.exists(self.database_path):
-            try:
-                with open(self.database_path, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                print(f"Error reading database file. Creating new database.")
-
-        # Create a new database structure if file doesn't exist or is invalid
-        db = {
-            "videos": [],  # Keep for backwards compatibility
-            "audios": [],
-            "reddit_links": []
-        }
-
-        # Add channel-specific video sections
-        for i in range(1, 5):
-            db[f"videos_channel{i}"] = []
-
-        return db
-
-    def _save_database(self):
-        """Save the database back to the JSON file"""
-        with open(self.database_path, 'w') as f:
-            json.dump(self.database, f, indent=2)
-
-    def scan_assets(self):
-        """Scan asset directories for new files and add them to the database"""
-        # Scan channel-specific video directories
-        for i in range(1, 5):
-            video_dir = f"assets/videos{i}"
-            self._scan_asset_directory(video_dir, f"videos_channel{i}")
-
-        # Scan audios directory
-        self._scan_asset_directory("assets/audios", "audios")
-
-        # Save changes to database
-        self._save_database()
-
-    def _scan_asset_directory(self, directory: str, asset_type: str):
-        """Scan a directory and add new files to the database"""
-        if not os.path.exists(directory):
-            print(f"Warning: Directory {directory} doesn't exist.")
+        self.legacy_database_path = legacy_database_path
+        self.conn = self._load_database()
+        # Normalized known link URLs (see _normalize_url), loaded on first use and kept in sync as links are added
+        self._link_set: Optional[set] = None
+
+    def _load_database(self) -> sqlite3.Connection:
+        """Open the SQLite database, creating the schema and importing the legacy JSON file if present"""
+        conn = sqlite3.connect(self.database_path, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+        """)
+        conn.executescript(ASSETS_SCHEMA)
+
+        if os.path.exists(self.legacy_database_path):
+            self._migrate_legacy_database(conn)
+
+        return conn
+
+    def _migrate_legacy_database(self, conn: sqlite3.Connection):
+        """One-shot import of the old JSON database; the file is renamed afterwards"""
+        try:
+            db = self._read_json(self.legacy_database_path)
+        except orjson.JSONDecodeError:
+            print(f"Error reading legacy database file {self.legacy_database_path}. Skipping import.")
             return
 
-        # Create the database section if it doesn't exist
-        if asset_type not in self.database:
-            self.database[asset_type] = []
-
-        # Get existing filenames in the database
-        existing_files = {item["filename"]
-                          for item in self.database[asset_type]}
-
-        # Scan directory for new files
-        for filename in os.listdir(directory):
-            if filename in existing_files:
+        self._normalize_timestamps(db)
+        asset_rows = []
+        link_rows = []
+        for asset_type, items in db.items():
+            if not isinstance(items, list):
                 continue
-
-            # Skip directories
-            if os.path.isdir(os.path.join(directory, filename)):
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                if asset_type == "reddit_links":
+                    if item.get("url"):
+                        link_rows.append((item["url"], item.get("last_used")))
+                elif item.get("filename"):
+                    asset_rows.append((asset_type, item["filename"],
+                                       item.get("path") or item["filename"],
+                                       item.get("last_used")))
+
+        with self._transaction(conn):
+            conn.executemany(
+                "INSERT OR IGNORE INTO assets (asset_type, filename, path, last_used) VALUES (?, ?, ?, ?)",
+                asset_rows)
+            conn.executemany(
+                "INSERT OR IGNORE INTO reddit_links (url, last_used) VALUES (?, ?)",
+                link_rows)
+
+        os.replace(self.legacy_database_path, self.legacy_database_path + ".migrated")
+        print(f"Imported {len(asset_rows)} assets and {len(link_rows)} links "
+              f"from {self.legacy_database_path}")
+
+    @staticmethod
+    def _read_json(path: str):
+        """Decode a JSON file, parsing straight from a memory map when it is large"""
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size <= MMAP_THRESHOLD:
+                return orjson.loads(f.read())
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    return orjson.loads(view)
+
+    @staticmethod
+    def _normalize_timestamps(db: Dict):
+        """Upgrade legacy date-only last_used values so they compare as strings"""
+        for items in db.values():
+            if not isinstance(items, list):
                 continue
+            for item in items:
+                if isinstance(item, dict) and item.get("last_used"):
+                    item["last_used"] = _normalize_ts(item["last_used"])
 
-            # Add new file to database
-            self.database[asset_type].append({
-                "filename": filename,
-                "path": os.path.join(directory, filename).replace("\\", "/"),
-                "last_used": None
-            })
-            print(f"Added new {asset_type} asset: {filename}")
+    @staticmethod
+    @contextmanager
+    def _transaction(conn: sqlite3.Connection):
+        """
+        Group writes into one explicit transaction: they land atomically and
+        share a single WAL sync instead of one per autocommitted statement
+        """
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+    def scan_assets(self):
+        """Scan asset directories for new files and add them to the database"""
+        # Channel-specific video directories plus the audios directory
+        directories = [(f"assets/videos{i}", f"videos_channel{i}") for i in range(1, 5)]
+        directories.append(("assets/audios", "audios"))
+
+        # Known filenames are read here; the connection stays on this thread
+        existing: Dict[str, set] = {asset_type: set() for _, asset_type in directories}
+        for asset_type, filename in self.conn.execute("SELECT asset_type, filename FROM assets"):
+            existing.setdefault(asset_type, set()).add(filename)
+
+        for directory, _ in directories:
+            if not os.path.exists(directory):
+                print(f"Warning: Directory {directory} doesn't exist.")
+        directories = [d for d in directories if os.path.exists(d[0])]
+
+        # The directory listings are independent and I/O bound, so overlap them.
+        # Reporting stays on this thread so the output is not interleaved.
+        new_rows = []
+        with ThreadPoolExecutor(max_workers=max(1, len(directories))) as pool:
+            results = pool.map(
+                lambda d: self._scan_asset_directory(d[0], d[1], existing[d[1]]),
+                directories)
+            for rows in results:
+                for row in rows:
+                    print(f"Added new {row[0]} asset: {row[1]}")
+                new_rows.extend(rows)
+
+        # Only take the write lock when something actually changed
+        if new_rows:
+            with self._transaction(self.conn):
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO assets (asset_type, filename, path, last_used) VALUES (?, ?, ?, NULL)",
+                    new_rows)
+
+    @staticmethod
+    def _scan_asset_directory(directory: str, asset_type: str,
+                              existing_files: set) -> List[Tuple[str, str, str]]:
+        """Scan a directory and return (asset_type, filename, path) rows for files not in existing_files"""
+        # Scan directory for new files (DirEntry caches the type, so no extra stat per file)
+        new_rows = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                filename = entry.name
+                if filename in existing_files:
+                    continue
+
+                # Skip directories
+                if entry.is_dir():
+                    continue
+
+                # Add new file to database
+                new_rows.append((asset_type, filename, entry.path.replace("\\", "/")))
+
+        return new_rows
 
     def check_new_links(self):
         """Check for new links in links.txt and add them to the database"""
-        if not os.path.exists(self.links_path):
-            print(f"Warning: Links file {self.links_path} doesn't exist.")
-            return
+        # A leftover .processing file means a previous run stopped before
+        # finishing; pick it up again instead of taking a new batch
+        processing_path = self.links_path + ".processing"
+        if not os.path.exists(processing_path):
+            if not os.path.exists(self.links_path):
+                print(f"Warning: Links file {self.links_path} doesn't exist.")
+                return
+            # Nothing to take if the file holds no links (e.g. empty or comments only)
+            if not any(line.strip().startswith("http")
+                       for line in Path(self.links_path).read_text().splitlines()):
+                return
+            # Move the file aside atomically so links appended by another
+            # writer in the meantime land in a fresh links.txt and are not lost,
+            # and leave an empty links.txt in its place
+            os.replace(self.links_path, processing_path)
+            open(self.links_path, 'a').close()
 
         # Get existing links
-        existing_links = {link["url"]
-                          for link in self.database["reddit_links"]}
-
-        # Read links file
-        new_links_added = False
-        with open(self.links_path, 'r') as f:
-            for line in f:
-                url = line.strip()
-                if url and url not in existing_links and url.startswith("http"):
-                    self.database["reddit_links"].append({
-                        "url": url,
-                        "last_used": None
-                    })
-                    existing_links.add(url)
-                    new_links_added = True
-                    print(f"Added new Reddit link: {url}")
-
-        # Save changes if any new links were added
-        if new_links_added:
-            self._save_database()
-
-            # Clear the links.txt file after adding the links
-            with open(self.links_path, 'w') as f:
-                f.write("")
+        if self._link_set is None:
+            self._link_set = {_normalize_url(row[0]) for row in self.conn.execute(
+                "SELECT url FROM reddit_links")}
+        existing_links = self._link_set
+
+        # Read links file; duplicates are detected on the normalized URL while
+        # the original URL is what gets stored
+        new_links = {}
+        kept_lines = []
+        for line in Path(processing_path).read_text().splitlines():
+            url = line.strip()
+            if not url:
+                continue
+            if not url.startswith("http"):
+                # Comments and other non-link lines stay in links.txt
+                kept_lines.append(line)
+                continue
+            key = _normalize_url(url)
+            if key not in existing_links and key not in new_links:
+                new_links[key] = url
+                print(f"Added new Reddit link: {url}")
+
+        if new_links:
+            with self._transaction(self.conn):
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO reddit_links (url, last_used) VALUES (?, NULL)",
+                    ((url,) for url in new_links.values()))
+            # Only remember the links once they are committed
+            existing_links.update(new_links)
+
+        if kept_lines:
+            with open(self.links_path, 'a') as f:
+                f.write("\n".join(kept_lines) + "\n")
+
+        # Drop the processed batch only once its links are stored
+        os.remove(processing_path)
 
     def select_assets(self) -> Tuple[str, str, Optional[str]]:
         """
@@ -124,61 +296,57 @@ class SelectorEngine:
         that has been used less recently or not at all
         """
         # Include full timestamp with hours, minutes, and seconds
-        today = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        today = _now_str()
 
-        # Select audio
-        audio = self._select_least_recently_used("audios")
-        if audio:
-            audio["last_used"] = today
+        with self._transaction(self.conn):
+            # Select audio
+            audio = self._select_least_recently_used("audios", today)
 
-        # Select Reddit link
-        reddit_link = self._select_least_recently_used("reddit_links")
+            # Select Reddit link
+            reddit_link = self._select_least_recently_used("reddit_links", today)
         link_url = None
         if reddit_link:
-            reddit_link["last_used"] = today
             link_url = reddit_link["url"]
 
-        # Save updated usage data
-        self._save_database()
-
         # Return the selected assets with None for video (will be selected per channel)
         audio_filename = audio["filename"] if audio else None
 
         return None, audio_filename, link_url
 
-    def _select_least_recently_used(self, asset_type: str) -> Optional[Dict]:
-        """Select an asset that was least recently used or not used at all"""
-        if not self.database[asset_type]:
+    def _select_least_recently_used(self, asset_type: str, now: str) -> Optional[Dict]:
+        """
+        Select an asset that was least recently used or not used at all and
+        mark it as used at `now`
+        """
+        if asset_type == "reddit_links":
+            table, index, where, params = "reddit_links", "idx_links_last_used", "", ()
+        else:
+            table, index, where, params = "assets", "idx_last_used", "WHERE asset_type = ?", (asset_type,)
+
+        # One pass over the last_used index: NULLs (never used) sort first, then
+        # the oldest timestamp, which orders correctly as a string (see
+        # _normalize_ts). random() picks uniformly among ties, so never-used
+        # assets are still chosen at random.
+        row = self.conn.execute(
+            f"SELECT rowid, * FROM {table} INDEXED BY {index} {where} "
+            f"ORDER BY last_used, random() LIMIT 1",
+            params).fetchone()
+        if row is None:
             return None
 
-        # First, try to find assets that have never been used
-        never_used = [item for item in self.database[asset_type]
-                      if item["last_used"] is None]
-        if never_used:
-            return random.choice(never_used)
-
-        # If all assets have been used, properly compare timestamps to find the oldest
-        def get_date_value(item):
-            """Convert date string to datetime object for comparison"""
-            if not item["last_used"]:
-                return datetime.datetime.min
-            try:
-                # Try parsing with hours, minutes, seconds
-                return datetime.datetime.strptime(item["last_used"], "%Y-%m-%d %H:%M:%S")
-            except ValueError:
-                try:
-                    # Fall back to date-only format for backward compatibility
-                    return datetime.datetime.strptime(item["last_used"], "%Y-%m-%d")
-                except ValueError:
-                    return datetime.datetime.min
-
-        # Return the item with the oldest timestamp
-        return min(self.database[asset_type], key=get_date_value)
+        self.conn.execute(
+            f"UPDATE {table} SET last_used = ? WHERE rowid = ?", (now, row["rowid"]))
+        item = dict(row)
+        del item["rowid"]
+        item["last_used"] = now
+        return item
 
     def select_video_from_folder(self, folder_name):
         """
         Select a video from a specific folder
         """
+        now_str = _now_str()
+
         # Map folder name to channel number
         channel_num = None
         if folder_name.startswith("videos"):
@@ -198,49 +366,54 @@ class SelectorEngine:
             print(f"Warning: Folder {folder_path} does not exist.")
             return None
 
+        # Index known videos by filename so each folder entry is a single lookup
+        index = {row["filename"]: dict(row) for row in self.conn.execute(
+            "SELECT filename, path, last_used FROM assets WHERE asset_type = ?", (asset_type,))}
+
         # Get all video files from the folder
         video_files = []
-        for filename in os.listdir(folder_path):
-            if filename.lower().endswith(('.mp4', '.mov', '.avi', '.mkv')):
-                # Check if this file is in our database
-                found = False
-                for video in self.database[asset_type]:
-                    if video['filename'] == filename:
-                        video_files.append(video)
-                        found = True
-                        break
+        new_rows = []
+        with os.scandir(folder_path) as it:
+            for entry in it:
+                filename = entry.name
+                if os.path.splitext(filename)[1].lower() not in _VIDEO_EXTS:
+                    continue
 
                 # If not in database, add it
-                if not found:
-                    new_video = {
+                video = index.get(filename)
+                if video is None:
+                    video = {
                         'filename': filename,
-                        'path': os.path.join(folder_path, filename).replace("\\", "/"),
+                        'path': entry.path.replace("\\", "/"),
                         'last_used': None
                     }
-                    self.database[asset_type].append(new_video)
-                    video_files.append(new_video)
+                    new_rows.append((asset_type, filename, video['path']))
+                    index[filename] = video
+                video_files.append(video)
 
         if not video_files:
             return None
 
-        # Sort by last_used (None or oldest first)
-        video_files.sort(key=lambda x: x['last_used'] or '0000-00-00')
+        # Pick the first video by last_used (None or oldest first)
+        video = min(video_files, key=lambda x: x['last_used'] or '0000-00-00')
 
-        # Mark the video as used
-        video_files[0]["last_used"] = datetime.datetime.now().strftime(
-            "%Y-%m-%d %H:%M:%S")
-        self._save_database()
+        # Record any new files and mark the video as used in one write
+        with self._transaction(self.conn):
+            if new_rows:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO assets (asset_type, filename, path, last_used) VALUES (?, ?, ?, NULL)",
+                    new_rows)
+            self.conn.execute(
+                "UPDATE assets SET last_used = ? WHERE asset_type = ? AND filename = ?",
+                (now_str, asset_type, video['filename']))
 
-        return video_files[0]['path']
+        return video['path']
 
     def select_audio(self):
         """
         Select an audio file using the existing logic
         """
-        audio = self._select_least_recently_used("audios")
+        audio = self._select_least_recently_used("audios", _now_str())
         if audio:
-            audio["last_used"] = datetime.datetime.now().strftime(
-                "%Y-%m-%d %H:%M:%S")
-            self._save_database()
             return audio["filename"]
         return None
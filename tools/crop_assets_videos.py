@@ -3,60 +3,57 @@ import json
 import os
 import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 VIDEO_EXTENSIONS = {".mp4", ".mov", ".avi", ".mkv"}
 DEFAULT_VIDEO_FOLDERS = ["assets/videos1",
                          "assets/videos2", "assets/videos3", "assets/videos4"]
-
-
-def get_video_dimensions(video_path: Path) -> tuple[int, int]:
+# Encoder arguments per --hwaccel choice; "none" is the CPU libx264 path
+HWACCEL_ENCODERS = {
+    "none": ["-c:v", "libx264", "-preset", "fast", "-crf", "23"],
+    "nvenc": ["-c:v", "h264_nvenc", "-preset", "p4", "-cq", "23"],
+    "qsv": ["-c:v", "h264_qsv", "-global_quality", "23"],
+    "amf": ["-c:v", "h264_amf", "-quality", "speed", "-qp_i", "23", "-qp_p", "23"],
+    "videotoolbox": ["-c:v", "h264_videotoolbox", "-b:v", "8M"],
+}
+# Consumer GPUs cap concurrent encode sessions, so hardware encoders default
+# to a small pool instead of the CPU-based sizing
+HWACCEL_DEFAULT_JOBS = 2
+
+
+def probe(video_path: Path) -> tuple[int, int, float]:
+    """Return (width, height, duration) of the first video stream from a single ffprobe call"""
     probe_cmd = [
         "ffprobe",
         "-v",
         "quiet",
         "-print_format",
         "json",
-        "-show_streams",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "stream=width,height:format=duration",
         str(video_path),
     ]
     result = subprocess.run(
         probe_cmd, capture_output=True, text=True, check=True)
     probe_data = json.loads(result.stdout)
 
-    video_stream = None
-    for stream in probe_data.get("streams", []):
-        if stream.get("codec_type") == "video":
-            video_stream = stream
-            break
-
-    if not video_stream:
+    streams = probe_data.get("streams") or []
+    if not streams:
         raise ValueError(f"No video stream found in {video_path}")
+    video_stream = streams[0]
 
-    return int(video_stream["width"]), int(video_stream["height"])
-
-
-def get_video_duration(video_path: Path) -> float:
-    probe_cmd = [
-        "ffprobe",
-        "-v",
-        "quiet",
-        "-print_format",
-        "json",
-        "-show_entries",
-        "format=duration",
-        str(video_path),
-    ]
-    result = subprocess.run(
-        probe_cmd, capture_output=True, text=True, check=True)
-    probe_data = json.loads(result.stdout)
+    duration = 0.0
     duration_str = (probe_data.get("format") or {}).get("duration")
-    if not duration_str:
-        return 0.0
-    try:
-        return float(duration_str)
-    except Exception:
-        return 0.0
+    if duration_str:
+        try:
+            duration = float(duration_str)
+        except Exception:
+            duration = 0.0
+
+    return int(video_stream["width"]), int(video_stream["height"]), duration
 
 
 def build_crop_filter(width: int, height: int) -> str:
@@ -71,31 +68,38 @@ def build_crop_filter(width: int, height: int) -> str:
         crop_x = (width - target_width) // 2
         crop_filter = f"crop={target_width}:{target_height}:{crop_x}:0"
 
-    return f"{crop_filter},scale=1080:1920"
+    return f"{crop_filter},scale=1080:1920,format=yuv420p"
+
 
+def _run_ffmpeg_with_progress(ffmpeg_cmd: list[str], total_duration_seconds: float,
+                              show_progress: bool = True, stdin=None):
+    if not show_progress:
+        subprocess.run(ffmpeg_cmd, stdin=stdin,
+                       stdout=subprocess.DEVNULL, check=True)
+        return
 
-def _run_ffmpeg_with_progress(ffmpeg_cmd: list[str], total_duration_seconds: float):
     process = subprocess.Popen(
         ffmpeg_cmd,
+        stdin=stdin,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1,
+        bufsize=65536,
     )
 
+    # Read raw bytes: most progress keys are discarded, so skip them on a
+    # prefix check without decoding. int() tolerates the trailing newline.
     last_percent = -1
     assert process.stdout is not None
-    for line in process.stdout:
-        line = line.strip()
-        if not line.startswith("out_time_ms="):
+    for raw in process.stdout:
+        if not raw.startswith(b"out_time_ms="):
             continue
-
-        out_time_ms_str = line.split("=", 1)[1].strip()
-        if not out_time_ms_str.isdigit():
+        if total_duration_seconds <= 0:
             continue
 
-        out_time_seconds = int(out_time_ms_str) / 1_000_000.0
-        if total_duration_seconds <= 0:
+        try:
+            out_time_seconds = int(raw[12:]) / 1_000_000.0
+        except ValueError:
+            # ffmpeg reports N/A before the first frame is written
             continue
 
         percent = int(
@@ -113,9 +117,9 @@ def _run_ffmpeg_with_progress(ffmpeg_cmd: list[str], total_duration_seconds: flo
         raise subprocess.CalledProcessError(return_code, ffmpeg_cmd)
 
 
-def process_video(video_path: Path, overwrite: bool = True, threads: int = 0) -> bool:
-    width, height = get_video_dimensions(video_path)
-    duration_seconds = get_video_duration(video_path)
+def process_video(video_path: Path, overwrite: bool = True, threads: int = 0,
+                  show_progress: bool = True, hwaccel: str = "none") -> bool:
+    width, height, duration_seconds = probe(video_path)
     filter_chain = build_crop_filter(width, height)
 
     temp_output = video_path.with_name(
@@ -132,27 +136,21 @@ def process_video(video_path: Path, overwrite: bool = True, threads: int = 0) ->
         str(video_path),
         "-vf",
         filter_chain,
-        "-c:v",
-        "libx264",
-        "-preset",
-        "fast",
-        "-crf",
-        "23",
+        *HWACCEL_ENCODERS[hwaccel],
         "-c:a",
         "copy",
         str(temp_output),
     ]
 
+    if hwaccel != "none":
+        # Decode on the same device; frames are downloaded for the crop/scale filters
+        ffmpeg_cmd[ffmpeg_cmd.index("-i"):ffmpeg_cmd.index("-i")] = ["-hwaccel", "auto"]
+
     if threads and threads > 0:
         ffmpeg_cmd[2:2] = ["-threads", str(threads)]
 
-    _run_ffmpeg_with_progress(ffmpeg_cmd, duration_seconds)
-
-    out_w, out_h = get_video_dimensions(temp_output)
-    if out_w != 1080 or out_h != 1920:
-        raise RuntimeError(
-            f"Output dimensions incorrect for {video_path}: {out_w}x{out_h}, expected 1080x1920"
-        )
+    # The filter chain ends in a fixed 1080x1920 scale, so the output is not reprobed
+    _run_ffmpeg_with_progress(ffmpeg_cmd, duration_seconds, show_progress)
 
     if overwrite:
         os.replace(temp_output, video_path)
@@ -188,28 +186,69 @@ def main():
         default=0,
         help="Limit FFmpeg threads per file (0 = ffmpeg default)",
     )
+    parser.add_argument(
+        "--hwaccel",
+        choices=list(HWACCEL_ENCODERS),
+        default="none",
+        help="Hardware encoder to use (default: none = libx264 on the CPU)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="Number of videos to encode in parallel "
+             f"(0 = cpu_count // max(threads, 2), or {HWACCEL_DEFAULT_JOBS} with --hwaccel)",
+    )
     args = parser.parse_args()
 
-    total = 0
-    succeeded = 0
-    failed = 0
-
+    videos = []
     for folder_str in args.folders:
         folder = Path(folder_str)
         print(f"\nProcessing folder: {folder}")
         if not folder.exists():
             print(f"  Skipping (folder not found): {folder}")
             continue
+        videos.extend(iter_videos(folder))
+
+    # Each ffmpeg is itself multi-threaded, so size the outer pool so that
+    # jobs * threads per job roughly matches the core count
+    cpu_count = os.cpu_count() or 1
+    if args.jobs:
+        jobs = args.jobs
+    elif args.hwaccel != "none":
+        jobs = HWACCEL_DEFAULT_JOBS
+    else:
+        jobs = cpu_count // max(args.threads, 2)
+    jobs = max(1, min(jobs, len(videos) or 1))
+    show_progress = jobs == 1
+
+    # --threads 0 lets every ffmpeg use all cores; with several jobs that
+    # oversubscribes the CPU, so split the cores between them explicitly
+    threads = args.threads
+    if threads <= 0 and jobs > 1:
+        threads = max(1, cpu_count // jobs)
+
+    total = len(videos)
+    succeeded = 0
+    failed = 0
 
-        for video_path in iter_videos(folder):
-            total += 1
-            print(f"  -> {video_path.name}")
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(
+                process_video,
+                video_path,
+                overwrite=not args.keep_temp,
+                threads=threads,
+                show_progress=show_progress,
+                hwaccel=args.hwaccel,
+            ): video_path
+            for video_path in videos
+        }
+        for future in as_completed(futures):
+            video_path = futures[future]
+            print(f"  -> {video_path}")
             try:
-                process_video(
-                    video_path,
-                    overwrite=not args.keep_temp,
-                    threads=args.threads,
-                )
+                future.result()
                 succeeded += 1
                 print("     ✓ done")
             except Exception as exc:
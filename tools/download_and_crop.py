@@ -1,22 +1,40 @@
 import argparse
 import os
+import subprocess
 import sys
-from pytube import YouTube
-from moviepy import VideoFileClip
+import yt_dlp
+from crop_assets_videos import _run_ffmpeg_with_progress, probe
+
+
+# Best video + best audio, fetching fragments concurrently
+YDL_FORMAT = "bv*+ba/best"
+YDL_CONCURRENT_FRAGMENTS = 8
+
+
+def _ydl_opts(output_path):
+    return {
+        "format": YDL_FORMAT,
+        "concurrent_fragment_downloads": YDL_CONCURRENT_FRAGMENTS,
+        "outtmpl": os.path.join(output_path, "%(title)s.%(ext)s"),
+    }
 
 
 def download_video(url, output_path):
     """Download a YouTube video at the highest resolution"""
     print(f"Downloading video from {url}...")
     try:
-        yt = YouTube(url)
-        video = yt.streams.get_highest_resolution()
-
         # Creating output directory if it doesn't exist
         os.makedirs(output_path, exist_ok=True)
 
-        # Download the video
-        video_path = video.download(output_path)
+        with yt_dlp.YoutubeDL(_ydl_opts(output_path)) as ydl:
+            info = ydl.extract_info(url, download=True)
+            # The final path (after merging) is reported in the info dict
+            downloads = info.get("requested_downloads") or []
+            if downloads and downloads[0].get("filepath"):
+                video_path = downloads[0]["filepath"]
+            else:
+                video_path = ydl.prepare_filename(info)
+
         print(f"Downloaded to {video_path}")
         return video_path
 
@@ -25,15 +43,16 @@ def download_video(url, output_path):
         sys.exit(1)
 
 
-def crop_to_9_16(video_path, output_path, center_x=None):
-    """Crop a video to 9:16 aspect ratio"""
-    print("Cropping video to 9:16 aspect ratio...")
+def fetch_video_info(url, output_path):
+    """Resolve metadata for the formats that would be downloaded, without downloading anything"""
+    with yt_dlp.YoutubeDL({**_ydl_opts(output_path), "quiet": True}) as ydl:
+        info = ydl.extract_info(url, download=False)
+        base_name = os.path.splitext(os.path.basename(ydl.prepare_filename(info)))[0]
+    return info, base_name
 
-    # Load the video
-    clip = VideoFileClip(video_path)
 
-    # Get current dimensions
-    width, height = clip.w, clip.h
+def build_crop_filter(width, height, center=None):
+    """Build the ffmpeg crop filter that cuts a 9:16 window out of a width x height frame"""
     current_ratio = width / height
     target_ratio = 9 / 16
 
@@ -41,48 +60,115 @@ def crop_to_9_16(video_path, output_path, center_x=None):
         f"Original dimensions: {width}x{height} (ratio: {current_ratio:.4f})")
     print(f"Target ratio: {target_ratio:.4f} (9:16)")
 
-    # Determine if we need to crop width or height to achieve 9:16
+    # Determine if we need to crop width or height to achieve 9:16.
+    # Crop sizes are kept even, as required by the H.264 encoder.
     if current_ratio > target_ratio:
         # Video is too wide, need to crop the width
-        new_width = height * target_ratio
+        new_width = int(height * target_ratio) // 2 * 2
 
         # Determine crop position
-        if center_x is None:
+        if center is None:
             # Default to center
-            x1 = max(0, (width - new_width) / 2)
+            x1 = max(0, (width - new_width) // 2)
         else:
             # Use specified center point
-            x1 = max(0, min(center_x - new_width / 2, width - new_width))
+            center_x = width * center
+            x1 = int(max(0, min(center_x - new_width / 2, width - new_width)))
+
+        print(f"Cropping width to {new_width} pixels (x1={x1})")
+        return f"crop={new_width}:{height}:{x1}:0"
 
-        print(f"Cropping width to {new_width:.1f} pixels (x1={x1:.1f})")
-        cropped_clip = clip.crop(x1=x1, y1=0, width=new_width, height=height)
+    # Video is too tall or already at right ratio, need to crop the height
+    new_height = int(width / target_ratio) // 2 * 2
+    y1 = max(0, (height - new_height) // 2)
+    print(f"Cropping height to {new_height} pixels (y1={y1})")
+    return f"crop={width}:{new_height}:0:{y1}"
+
+
+def _encode_9_16(source, output_filename, crop_filter, duration, stdin=None):
+    """Crop and encode `source` (a path, or pipe:0 when `stdin` is given) in one ffmpeg pass"""
+    print(f"Saving cropped video (this may take a while)...")
+    ffmpeg_cmd = [
+        "ffmpeg",
+        "-y",
+        "-progress",
+        "pipe:1",
+        "-nostats",
+        "-loglevel",
+        "error",
+        "-i",
+        source,
+        "-vf",
+        f"{crop_filter},fps=30",
+        "-c:v",
+        "h264_amf",
+        "-b:v",
+        "8000k",
+        "-c:a",
+        "aac",
+        output_filename,
+    ]
+    _run_ffmpeg_with_progress(ffmpeg_cmd, duration, stdin=stdin)
+
+    print(f"Cropped video saved to {output_filename}")
+    return output_filename
 
-    else:
-        # Video is too tall or already at right ratio, need to crop the height
-        new_height = width / target_ratio
-        y1 = max(0, (height - new_height) / 2)
-        print(f"Cropping height to {new_height:.1f} pixels (y1={y1:.1f})")
-        cropped_clip = clip.crop(x1=0, y1=y1, width=width, height=new_height)
+
+def crop_to_9_16(video_path, output_path, center=None):
+    """Crop a local video to 9:16 aspect ratio with a single ffmpeg pass"""
+    print("Cropping video to 9:16 aspect ratio...")
+
+    width, height, duration = probe(video_path)
+    crop_filter = build_crop_filter(width, height, center)
 
     # Create output filename
     base_name = os.path.splitext(os.path.basename(video_path))[0]
     output_filename = os.path.join(output_path, f"{base_name}_9x16.mp4")
 
-    # Save the cropped video
-    print(f"Saving cropped video (this may take a while)...")
-    cropped_clip.write_videofile(
-        output_filename,
-        codec="h264_amf",
-        audio_codec="aac",
-        fps=30,
-        preset="medium",
-        bitrate="8000k")
+    return _encode_9_16(video_path, output_filename, crop_filter, duration)
 
-    # Close clips
-    clip.close()
-    cropped_clip.close()
 
-    print(f"Cropped video saved to {output_filename}")
+def download_and_crop(url, output_path, center=None):
+    """
+    Stream the download straight into ffmpeg and crop it on the fly, so the
+    full-size source never touches the disk. Crop parameters come from the
+    metadata yt-dlp resolves up front.
+    """
+    print(f"Fetching video info for {url}...")
+    info, base_name = fetch_video_info(url, output_path)
+    width, height = info.get("width"), info.get("height")
+    if not width or not height:
+        # Some extractors do not report dimensions; fall back to a local file
+        print("Video dimensions unavailable, downloading before cropping...")
+        return crop_to_9_16(download_video(url, output_path), output_path, center)
+
+    os.makedirs(output_path, exist_ok=True)
+    output_filename = os.path.join(output_path, f"{base_name}_9x16.mp4")
+
+    print("Cropping video to 9:16 aspect ratio...")
+    crop_filter = build_crop_filter(width, height, center)
+
+    downloader = subprocess.Popen(
+        [
+            sys.executable, "-m", "yt_dlp",
+            "--quiet", "--no-warnings",
+            "-f", YDL_FORMAT,
+            "-N", str(YDL_CONCURRENT_FRAGMENTS),
+            "-o", "-",
+            url,
+        ],
+        stdout=subprocess.PIPE,
+    )
+    try:
+        _encode_9_16("pipe:0", output_filename, crop_filter,
+                     info.get("duration") or 0, stdin=downloader.stdout)
+    finally:
+        # Let yt-dlp see a broken pipe if ffmpeg stopped early
+        downloader.stdout.close()
+        return_code = downloader.wait()
+    if return_code != 0:
+        raise subprocess.CalledProcessError(return_code, downloader.args)
+
     return output_filename
 
 
@@ -102,16 +188,8 @@ def main():
             print("Center value must be between 0.0 and 1.0")
             sys.exit(1)
 
-        # Download the video
-        video_path = download_video(args.url, args.output)
-
-        # Calculate center_x pixel position
-        clip = VideoFileClip(video_path)
-        center_x = clip.w * args.center
-        clip.close()
-
-        # Crop the video
-        cropped_path = crop_to_9_16(video_path, args.output, center_x)
+        # Download and crop the video in one pass
+        cropped_path = download_and_crop(args.url, args.output, args.center)
 
         print("Process completed successfully!")
 